@@ -1,19 +1,22 @@
 #!/usr/bin/env python3
 
-import json
 import argparse
-from collections import Counter
+from collections import defaultdict
+
+import orjson
 
 from oci_parser_core import (
-    analyze_uris,
+    analyze_entries,
     choose_best_hostname,
     HOSTNAME_IDENTITY_MAP,
     MITRE_ATTACK_TYPES,
     OWASP_TOP10_MAP,
 )
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, TableStyle
+from reportlab.platypus import Table as PdfTable
 from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 
 from rich.console import Console
@@ -23,6 +26,20 @@ from rich.text import Text
 
 console = Console()
 
+# Satu style untuk semua tabel PDF (sel berupa string biasa, tanpa parsing markup Paragraph)
+PDF_TABLE_STYLE = TableStyle([
+    ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+    ("FONTSIZE", (0, 0), (-1, -1), 10),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("ALIGN", (-1, 0), (-1, -1), "RIGHT"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+def _pdf_table(story, rows):
+    """Tambahkan satu Table untuk seluruh baris section (skip jika kosong)."""
+    if rows:
+        story.append(PdfTable(rows, style=PDF_TABLE_STYLE, hAlign="LEFT"))
+
 # ========== EXPORT PDF ========== #
 def export_pdf_elegant(logo, host, identity, summary, owasp, sev, out="Executive_Report.pdf"):
     styles = getSampleStyleSheet()
@@ -42,30 +59,34 @@ def export_pdf_elegant(logo, host, identity, summary, owasp, sev, out="Executive
     story.append(PageBreak())
 
     story.append(Paragraph("<b><font size=18>1. OWASP Top 10 Summary</font></b>", styles["Heading2"]))
-    for cat, cnt in owasp.items():
-        story.append(Paragraph(f"• {cat}: {cnt}", styles["Normal"]))
+    _pdf_table(story, [[cat, str(cnt)] for cat, cnt in owasp.items()])
     story.append(PageBreak())
 
     story.append(Paragraph("<b><font size=18>2. Severity Distribution</font></b>", styles["Heading2"]))
-    for sev_key, sev_cnt in sev.items():
-        story.append(Paragraph(f"• {sev_key}: {sev_cnt}", styles["Normal"]))
+    _pdf_table(story, [[sev_key, str(sev_cnt)] for sev_key, sev_cnt in sev.items()])
     story.append(PageBreak())
 
     story.append(Paragraph("<b><font size=18>3. MITRE ATT&CK Details</font></b>", styles["Heading2"]))
-    for mid, d in summary.items():
-        desc = MITRE_ATTACK_TYPES.get(mid, "-")
-        story.append(Paragraph(f"{mid} - {desc}: {d['count']} temuan", styles["Normal"]))
+    _pdf_table(story, [
+        [mid, MITRE_ATTACK_TYPES.get(mid, "-"), f"{d['count']} temuan"]
+        for mid, d in summary.items()
+    ])
 
     doc.build(story)
     return out
 
 # ========== EXPORT DASHBOARD STATIC ========== #
 def export_dashboard(data_json, template_path="templates/dashboard_pro.html", output="dashboard.html"):
-    with open(template_path, "r") as f:
-        template = f.read()
-    html = template.replace("{{DATA_JSON}}", json.dumps(data_json))
-    with open(output, "w") as f:
-        f.write(html)
+    # Tulis langsung potongan template + JSON ke file, tanpa membangun
+    # string HTML penuh hasil replace di memori.
+    with open(template_path, "rb") as f:
+        parts = f.read().split(b"{{DATA_JSON}}")
+    payload = orjson.dumps(data_json)
+    with open(output, "wb") as f:
+        f.write(parts[0])
+        for part in parts[1:]:
+            f.write(payload)
+            f.write(part)
     return output
 
 # ========== MAIN CLI ========== #
@@ -77,21 +98,24 @@ def main():
     parser.add_argument("--logo-path", default=None)
     args = parser.parse_args()
 
-    entries = json.load(open(args.json_file))
-    summary = analyze_uris(entries)
+    with open(args.json_file, "rb") as f:
+        entries = orjson.loads(f.read())
+    summary, hostname_counts = analyze_entries(entries)
 
-    host = choose_best_hostname(entries)
+    host = choose_best_hostname(hostname_counts)
     identity = HOSTNAME_IDENTITY_MAP.get(host, "Unknown")
 
     # OWASP SUMMARY
-    owasp_counter = Counter()
+    total_attacks = 0
+    owasp_counter = defaultdict(int)
     for mid, d in summary.items():
+        total_attacks += d["count"]
         owasp = OWASP_TOP10_MAP.get(mid)
         if owasp:
             owasp_counter[owasp] += d["count"]
 
     # Severity (simple)
-    sev_counter = Counter({"HIGH": sum(d["count"] for d in summary.values())})
+    sev_counter = {"HIGH": total_attacks}
 
     # Output console summary
     console.print(Panel.fit(
@@ -102,7 +126,6 @@ def main():
 
     # Generate Dashboard
     if args.export_dashboard:
-        total_attacks = sum(d["count"] for d in summary.values())
         data_json = {
             "hostname": host,
             "identity": identity,
@@ -10,50 +10,244 @@ Core analyzer untuk OCI WAF JSON log:
   {
     "T1190": {
         "count": 12,
-        "uris": [...],
-        "entries": [...],
+        "uris": {...},   # set URI unik
+        "example_entry": {...},   # entry pertama yang cocok
     },
     ...
   }
 """
 
 import re
+import sys
 from collections import defaultdict
+from collections.abc import Iterable
 from urllib.parse import urlparse
 
 # ============================================================
 #  MITRE URI PATTERNS (FALSE NEGATIVE / WAF BYPASS STYLE)
 # ============================================================
 
+# Prefilter literal untuk tiap pola diturunkan otomatis saat import (lihat
+# _build_uri_matchers), jadi pola bisa di-tuning langsung di tabel ini.
+#
+# Semua pola dicocokkan case-insensitive (lihat _COMPILED_URI_PATTERNS untuk
+# URI ASCII dan _URI_PATTERNS_IGNORECASE untuk URI non-ASCII), jadi tidak
+# perlu inline flag (?i).
 MITRE_FALSE_NEGATIVE_URI_PATTERNS = {
     # RCE / exploit
-    "T1059.004": r"(?i)shellshock|;\s*echo\s+shellshock|/cgi-bin/|User-Agent:.*\(\)\s*{",  # Shellshock
-    "T1505.003": r"(?i)phpunit|eval-stdin\.php",
-    "T1059.001": r"(?i)(cmd|command|exec|system|passthru|shell_exec)\s*=",
-    "T1190": r"(?i)(\bUNION\b|\bSELECT\b|\bUPDATE\b|\bDELETE\b|\bINSERT\b).*(\bFROM\b|\bWHERE\b)|(\bOR\b\s+1=1)",
+    "T1059.004": r"shellshock|;\s*echo\s+shellshock|/cgi-bin/|User-Agent:.*\(\)\s*{",  # Shellshock
+    "T1505.003": r"phpunit|eval-stdin\.php",
+    "T1059.001": r"(cmd|command|exec|system|passthru|shell_exec)\s*=",
+    "T1190": r"(\bUNION\b|\bSELECT\b|\bUPDATE\b|\bDELETE\b|\bINSERT\b).*(\bFROM\b|\bWHERE\b)|(\bOR\b\s+1=1)",
 
     # File disclosure / traversal / LFI/RFI
     "T1203": r"(\.\./|\.\.\\|%2e%2e%2f|%2e%2e\\|/etc/passwd|boot.ini|/windows/win.ini)",
-    "T1592.004": r"(?i)\.env\b|/\.git\b|/config(\.php|\.json|\.ini)?\b|/backup\b|/dump\b|/db\b|phpinfo\.php",
+    "T1592.004": r"\.env\b|/\.git\b|/config(\.php|\.json|\.ini)?\b|/backup\b|/dump\b|/db\b|phpinfo\.php",
 
     # Web shell / debugging
-    "T1505": r"(?i)(wso\.php|r57\.php|c99\.php|webshell)",
-    "T1595.003": r"(?i)XDEBUG_SESSION_START=phpstorm",
+    "T1505": r"(wso\.php|r57\.php|c99\.php|webshell)",
+    "T1595.003": r"XDEBUG_SESSION_START=phpstorm",
 
     # XSS
-    "T1055": r"(?i)(<script|%3Cscript%3E|onerror=|onload=|javascript:)",
+    "T1055": r"(<script|%3Cscript%3E|onerror=|onload=|javascript:)",
 
     # Brute force / auth
-    "T1110.001": r"(?i)/login|/signin|/mtos/login/login\.mtos|/wp-login\.php|/xmlrpc\.php",
+    "T1110.001": r"/login|/signin|/mtos/login/login\.mtos|/wp-login\.php|/xmlrpc\.php",
 
     # Recon / scanning
-    "T1595.001": r"(?i)/admin\b|/panel\b|/dashboard\b|/config\b|/test\b|/dev\b|/setup\b",
-    "T1595.002": r"(?i)/login\b|/signin\b|/auth\b",
+    "T1595.001": r"/admin\b|/panel\b|/dashboard\b|/config\b|/test\b|/dev\b|/setup\b",
+    "T1595.002": r"/login\b|/signin\b|/auth\b",
 
     # Sensitive file listing / misconfig
-    "T1083": r"(?i)index\.of/|dirlisting|directory listing",
+    "T1083": r"index\.of/|dirlisting|directory listing",
 }
 
+# MITRE ID di-intern: ID bertitik ("T1059.004") tidak otomatis di-intern oleh
+# CPython, jadi tanpa ini lookup di tabel SeverityEngine (juga di-intern)
+# selalu membandingkan isi string, bukan identitas objek.
+MITRE_FALSE_NEGATIVE_URI_PATTERNS = {
+    sys.intern(mitre_id): pattern
+    for mitre_id, pattern in MITRE_FALSE_NEGATIVE_URI_PATTERNS.items()
+}
+
+
+def _lowercase_literals(pattern: str) -> str:
+    """
+    Lowercase bagian literal dari pola regex.
+    Escape sequence (\\b, \\s, \\S, ...) dibiarkan apa adanya.
+    """
+    return re.sub(
+        r"\\.|[^\\]+",
+        lambda m: m.group(0) if m.group(0)[0] == "\\" else m.group(0).lower(),
+        pattern,
+    )
+
+
+# Compile sekali saat import, bukan per entry × per pola.
+# Pola di-lowercase dan dicocokkan ke uri.lower() → tanpa re.IGNORECASE,
+# sehingga engine tidak perlu case-folding per karakter per pola.
+# Ini hanya setara dengan IGNORECASE untuk URI ASCII.
+_COMPILED_URI_PATTERNS = {
+    mitre_id: re.compile(_lowercase_literals(pattern))
+    for mitre_id, pattern in MITRE_FALSE_NEGATIVE_URI_PATTERNS.items()
+}
+
+# URI non-ASCII tetap memakai case-folding Unicode dari re.IGNORECASE
+# (mis. "/ſignin" cocok dengan /signin, "/ADMİN" dengan /admin), karena
+# uri.lower() tidak melipat karakter seperti itu ke huruf ASCII.
+_URI_PATTERNS_IGNORECASE = {
+    mitre_id: re.compile(pattern, re.IGNORECASE)
+    for mitre_id, pattern in MITRE_FALSE_NEGATIVE_URI_PATTERNS.items()
+}
+
+# ============================================================
+#  PREFILTER LITERAL (diturunkan otomatis dari pola)
+# ============================================================
+# Untuk setiap pola dihitung himpunan literal yang WAJIB muncul: URI hanya
+# bisa cocok jika mengandung minimal salah satunya. Cek `in` jauh lebih
+# murah daripada regex, jadi regex hanya jalan jika lolos prefilter.
+# Karena diturunkan dari hasil parse pola, prefilter selalu ikut berubah
+# saat MITRE_FALSE_NEGATIVE_URI_PATTERNS di-tuning.
+# Pola yang isinya murni alternation literal (mis. "wso\.php|webshell")
+# bahkan tidak perlu regex: lolos prefilter = pasti cocok.
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse as _sre_parse
+
+# Batas jumlah kombinasi literal per urutan (mis. "(a|b)(c|d)" → 4)
+_MAX_LITERAL_SET = 64
+
+
+def _best_literals(candidates: list) -> frozenset | None:
+    """Pilih himpunan wajib paling selektif (literal terpendek paling panjang)."""
+    best = None
+    for cand in candidates:
+        if not cand or "" in cand:
+            continue
+        key = (min(map(len, cand)), -len(cand))
+        if best is None or key > best[0]:
+            best = (key, cand)
+    return best[1] if best else None
+
+
+def _product(left, right) -> frozenset | None:
+    """Semua gabungan x + y, atau None jika melebihi _MAX_LITERAL_SET."""
+    if len(left) * len(right) > _MAX_LITERAL_SET:
+        return None
+    return frozenset(x + y for x in left for y in right)
+
+
+def _required_literals(items) -> tuple:
+    """
+    Analisis satu urutan hasil parse regex.
+    Return (required, exact, prefixes), masing-masing frozenset atau None:
+    - required: literal yang salah satunya pasti ada di setiap match;
+    - exact: semua string yang bisa dicocokkan (hanya jika urutan murni literal);
+    - prefixes: literal yang menjadi awalan setiap match.
+    """
+    candidates = []
+    cur = frozenset({""})
+    prefixes = None
+    all_exact = True
+
+    for op, av in items:
+        req, exact, pre = _node_literals(op, av)
+        if exact is not None:
+            merged = _product(cur, exact)
+            if merged is not None:
+                cur = merged
+                continue
+
+        # Node bukan literal murni: literal sebelum node + awalan node tsb
+        # tetap bersambung, setelah itu rangkaian literal dimulai ulang
+        joined = _product(cur, pre) if pre is not None else None
+        if all_exact:
+            prefixes = joined if joined is not None else cur
+        all_exact = False
+        candidates.extend(c for c in (cur, joined, exact, req) if c is not None)
+        cur = frozenset({""})
+    candidates.append(cur)
+
+    if all_exact:
+        prefixes = cur
+    if prefixes is not None and "" in prefixes:
+        prefixes = None
+    return _best_literals(candidates), (cur if all_exact else None), prefixes
+
+
+def _node_literals(op, av) -> tuple:
+    """(required, exact, prefixes) untuk satu node; lihat _required_literals."""
+    if op is _sre_parse.LITERAL:
+        ch = frozenset({chr(av)})
+        return ch, ch, ch
+
+    if op is _sre_parse.IN:
+        if all(o is _sre_parse.LITERAL for o, _ in av):
+            chars = frozenset(chr(c) for _, c in av)
+            return chars, chars, chars
+        return None, None, None
+
+    if op is _sre_parse.SUBPATTERN:
+        _group, add_flags, del_flags, sub = av
+        if add_flags or del_flags:
+            return None, None, None
+        return _required_literals(sub)
+
+    if op is _sre_parse.BRANCH:
+        results = [_required_literals(alt) for alt in av[1]]
+        unions = []
+        for i in range(3):
+            parts = [r[i] for r in results]
+            unions.append(
+                None if any(p is None for p in parts) else frozenset().union(*parts)
+            )
+        return tuple(unions)
+
+    if op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT):
+        lo, hi, sub = av
+        if lo < 1:
+            return None, None, None
+        req, exact, pre = _required_literals(sub)
+        return req, (exact if lo == hi == 1 else None), pre
+
+    # \b, \s, ., kelas karakter, lookaround, dsb.: tidak ada literal wajib
+    return None, None, None
+
+
+def _minimal_literals(literals) -> tuple[str, ...]:
+    """Buang literal yang memuat literal lain (cek `in` yang lebih pendek sudah cukup)."""
+    kept = []
+    for lit in sorted(literals, key=lambda x: (len(x), x)):
+        if not any(k in lit for k in kept):
+            kept.append(lit)
+    return tuple(kept)
+
+
+# (mitre_id, literals, pattern) dengan urutan sama seperti
+# MITRE_FALSE_NEGATIVE_URI_PATTERNS:
+# - pola murni literal: pattern None (lolos prefilter = pasti cocok);
+# - pola regex: literals = prefilter wajib (None = tanpa prefilter, regex
+#   selalu dijalankan).
+def _build_uri_matchers() -> tuple:
+    matchers = []
+    for mitre_id, pattern in _COMPILED_URI_PATTERNS.items():
+        try:
+            required, exact, _ = _required_literals(_sre_parse.parse(pattern.pattern))
+        except Exception:
+            required, exact = None, None
+
+        if exact is not None and "" not in exact:
+            matchers.append((mitre_id, _minimal_literals(exact), None))
+        elif required is not None:
+            matchers.append((mitre_id, _minimal_literals(required), pattern))
+        else:
+            matchers.append((mitre_id, None, pattern))
+    return tuple(matchers)
+
+
+_URI_MATCHERS = _build_uri_matchers()
+
 # ============================================================
 #  MITRE ATT&CK TYPE LABELS (untuk tabel / dashboard)
 # ============================================================
@@ -128,6 +322,20 @@ HOSTNAME_IDENTITY_MAP = {
 #  ANALYZER: dari list entries → summary per MITRE ID
 # ============================================================
 
+def extract_hostname(e: dict) -> str | None:
+    """Ambil hostname dari berbagai kemungkinan field (urutan prioritas)."""
+    h = (
+        e.get("Host Name (Server)")
+        or e.get("hostname")
+        or e.get("host")
+        or e.get("server")
+        or e.get("Host")
+    )
+    if not h:
+        return None
+    return str(h).strip().lower()
+
+
 def _get_uri(entry: dict) -> str:
     """
     Ambil URI dari berbagai kemungkinan field.
@@ -147,34 +355,110 @@ def _get_uri(entry: dict) -> str:
     return ""
 
 
-def analyze_uris(entries: list[dict]) -> dict:
+def analyze_uris(entries: Iterable[dict]) -> dict:
     """
-    Menganalisis list log entries (JSON) dan mengembalikan summary:
+    Menganalisis log entries (JSON) dan mengembalikan summary.
+    `entries` cukup iterable (list, generator, dsb.); dibaca sekali jalan.
+    Format summary:
     {
       "T1190": {
           "count": 10,
-          "uris": [...],
-          "entries": [...],
+          "uris": {...},   # set URI unik
+          "example_entry": {...},   # entry pertama yang cocok
       },
       ...
     }
     """
-    summary = defaultdict(lambda: {"count": 0, "uris": [], "entries": []})
+    summary = _new_summary()
+    matches = {}
+    for e in entries:
+        _match_entry(summary, e, matches)
+    return summary
 
+
+def analyze_entries(entries: Iterable[dict]) -> tuple[dict, dict]:
+    """
+    Versi satu-pass untuk CLI: summary MITRE (sama dengan analyze_uris)
+    sekaligus hitungan hostname per entry, tanpa membaca entries dua kali.
+    Return: (summary, hostname_counts)
+    """
+    summary = _new_summary()
+    hostname_counts = defaultdict(int)
+    matches = {}
     for e in entries:
-        uri = _get_uri(e)
-        if not uri:
-            continue
+        h = extract_hostname(e)
+        if h:
+            hostname_counts[h] += 1
+        _match_entry(summary, e, matches)
+    return summary, hostname_counts
 
-        for mitre_id, pattern in MITRE_FALSE_NEGATIVE_URI_PATTERNS.items():
-            try:
-                if re.search(pattern, uri, re.IGNORECASE):
-                    summary[mitre_id]["count"] += 1
-                    if uri not in summary[mitre_id]["uris"]:
-                        summary[mitre_id]["uris"].append(uri)
-                    summary[mitre_id]["entries"].append(e)
-            except re.error:
-                # kalau regex invalid, jangan sampai script mati
-                continue
 
-    return summary
+def choose_best_hostname(hostname_counts: dict) -> str:
+    """
+    Pilih hostname paling dominan, utamakan yang dikenal di
+    HOSTNAME_IDENTITY_MAP. Return "-" jika tidak ada hostname.
+    Jika seri, hostname yang muncul lebih dulu menang.
+    """
+    best = None
+    best_known = None
+    for host, cnt in hostname_counts.items():
+        if best is None or cnt > best[1]:
+            best = (host, cnt)
+        if host in HOSTNAME_IDENTITY_MAP and (best_known is None or cnt > best_known[1]):
+            best_known = (host, cnt)
+    if best_known is not None:
+        return best_known[0]
+    if best is not None:
+        return best[0]
+    return "-"
+
+
+def _new_summary() -> defaultdict:
+    return defaultdict(lambda: {"count": 0, "uris": set(), "example_entry": None})
+
+
+def _match_entry(summary: dict, e: dict, matches: dict) -> None:
+    """
+    Cocokkan URI satu entry ke semua pola MITRE dan update summary.
+    `matches` adalah memo URI → MITRE ID milik satu pemanggilan analyze_*:
+    scanner biasanya menembak path yang sama ribuan kali, jadi regex cukup
+    dijalankan sekali per URI unik, dan memo ikut dibuang setelah analisis.
+    """
+    uri = _get_uri(e)
+    if not uri:
+        return
+
+    hits = matches.get(uri)
+    if hits is None:
+        hits = matches[uri] = _match_uri(uri)
+
+    for mitre_id in hits:
+        bucket = summary[mitre_id]
+        bucket["count"] += 1
+        bucket["uris"].add(uri)
+        if bucket["example_entry"] is None:
+            bucket["example_entry"] = e
+
+
+def _match_uri(uri: str) -> tuple[str, ...]:
+    """MITRE ID yang cocok untuk satu URI (urutan sesuai tabel pola)."""
+    if not uri.isascii():
+        # Prefilter & pola lowercase hanya valid untuk ASCII (lihat atas)
+        return tuple(
+            mitre_id
+            for mitre_id, pattern in _URI_PATTERNS_IGNORECASE.items()
+            if pattern.search(uri)
+        )
+
+    uri_lc = uri.lower()
+    hits = []
+    for mitre_id, literals, pattern in _URI_MATCHERS:
+        if literals is not None:
+            for lit in literals:
+                if lit in uri_lc:
+                    break
+            else:
+                continue
+        if pattern is None or pattern.search(uri_lc):
+            hits.append(mitre_id)
+    return tuple(hits)
@@ -3,43 +3,49 @@
 
 import argparse
 import glob
-import json
 import os
+import threading
+from collections.abc import Iterable, Iterator
 from datetime import datetime
-from collections import Counter
+from collections import defaultdict
+from functools import lru_cache
 
+import orjson
 from flask import Flask, jsonify, render_template
 from flask_cors import CORS
 
 # Core logic dari oci_parser_core.py
 from oci_parser_core import (
     analyze_uris,
+    extract_hostname,
     OWASP_TOP10_MAP,
     MITRE_ATTACK_TYPES,
     HOSTNAME_IDENTITY_MAP,
 )
 
 # Severity automode engine
-from severity_engine import SeverityEngine
+from severity_engine import get_engine
 
 
 # ============================================================
 #  TENANT WHITELIST YANG DIDUKUNG DASHBOARD
 # ============================================================
-WHITELIST_TENANTS = {
+WHITELIST_TENANTS = frozenset({
     "tos-nusantara.pelindo.co.id",
     "praya.pelindo.co.id",
     "parama.pelindo.co.id",
     "phinnisi.pelindo.co.id",
     "ptosc.pelindo.co.id",
     "ptosr.pelindo.co.id",
-}
+})
 
 
 # ============================================================
 #  SEVERITY ENGINE (AUTOMODE ACUNETIX + CVSS + ESCALATION)
 # ============================================================
-SEVERITY_ENGINE = SeverityEngine(
+# Dibuat saat import (sebelum fork worker, mis. gunicorn --preload) supaya
+# semua worker berbagi mapping & tabel yang sama secara copy-on-write.
+SEVERITY_ENGINE = get_engine(
     mapping_path="severity_mapping.json",
     mode="auto"
 )
@@ -62,8 +68,8 @@ def resolve_log_files(spec: str) -> list[str]:
 def safe_load_json(path: str) -> list[dict]:
     """Load JSON list atau {"items": [...]}."""
     try:
-        with open(path, "r") as f:
-            data = json.load(f)
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
         if isinstance(data, list):
             return data
         if isinstance(data, dict) and isinstance(data.get("items"), list):
@@ -74,33 +80,53 @@ def safe_load_json(path: str) -> list[dict]:
         return []
 
 
-def load_all_entries(log_files: list[str]) -> list[dict]:
-    """Gabungkan semua log JSON ke dalam satu list entries."""
-    entries = []
+def iter_entries(log_files: list[str]) -> Iterator[dict]:
+    """
+    Yield entries dari semua log JSON, file demi file.
+    Tidak menggabungkan semua file ke satu list besar, jadi hanya satu
+    file yang ada di memori pada satu waktu.
+    """
     for f in log_files:
-        entries.extend(safe_load_json(f))
-    return entries
+        yield from safe_load_json(f)
+
+
+def log_files_signature(log_files: list[str]) -> tuple:
+    """Signature (path, mtime_ns, size) semua log; berubah jika ada file yang diubah."""
+    sig = []
+    for p in log_files:
+        try:
+            st = os.stat(p)
+            sig.append((p, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((p, None, None))
+    return tuple(sig)
 
 
 # ============================================================
 #  HELPERS
 # ============================================================
-def extract_hostname(e: dict) -> str | None:
-    """Ambil hostname dari berbagai kemungkinan field."""
-    if "Host Name (Server)" in e and e["Host Name (Server)"]:
-        return str(e["Host Name (Server)"]).strip().lower()
-
-    for key in ("hostname", "host", "server", "Host"):
-        if key in e and e[key]:
-            return str(e[key]).strip().lower()
-
-    return None
+_OCI_MONTHS = {
+    m: i
+    for i, m in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun",
+         "jul", "aug", "sep", "oct", "nov", "dec"),
+        start=1,
+    )
+}
 
 
 def parse_oci_time(t: str | None) -> int | None:
     """Parse waktu OCI menjadi epoch timestamp."""
-    if not t:
+    if not t or not isinstance(t, str):
         return None
+    return _parse_oci_time_cached(t)
+
+
+@lru_cache(maxsize=131072)
+def _parse_oci_time_cached(t: str) -> int | None:
+    ts = _parse_oci_time_fast(t)
+    if ts is not None:
+        return ts
 
     formats = [
         "%b %d, %Y %I:%M:%S.%f %p",
@@ -116,27 +142,124 @@ def parse_oci_time(t: str | None) -> int | None:
     return None
 
 
-def choose_primary_tenant(entries: list[dict]) -> str:
-    """Ambil hostname paling dominan dari whitelist."""
-    c = Counter()
-    for e in entries:
-        h = extract_hostname(e)
-        if h in WHITELIST_TENANTS:
-            c[h] += 1
-    if not c:
+def _parse_oci_time_fast(t: str) -> int | None:
+    """
+    Parser manual untuk format OCI "Nov 24, 2025 10:11:12.345 AM"
+    (pecahan detik opsional), jauh lebih cepat daripada strptime.
+    Return None jika bentuknya tidak persis seperti itu → fallback ke strptime.
+    """
+    parts = t.split(" ")
+    if len(parts) != 5 or not t.isascii():
+        return None
+    mon, day, year, clock, ampm = parts
+
+    month = _OCI_MONTHS.get(mon.lower())
+    hms = clock.split(":")
+    ampm = ampm.upper()
+    if (
+        month is None
+        or not day.endswith(",")
+        or not 2 <= len(day) <= 3
+        or not day[:-1].isdigit()
+        or len(year) != 4
+        or not year.isdigit()
+        or len(hms) != 3
+        or ampm not in ("AM", "PM")
+    ):
+        return None
+
+    hh, mm, ss = hms
+    ss, _, frac = ss.partition(".")
+    # isdigit() juga menolak tanda "+"/"-" yang masih diterima int()
+    if (
+        not 1 <= len(hh) <= 2
+        or len(mm) != 2
+        or len(ss) != 2
+        or not (hh.isdigit() and mm.isdigit() and ss.isdigit())
+        or (frac and not (len(frac) <= 6 and frac.isdigit()))
+        or (not frac and "." in clock)
+    ):
+        return None
+
+    try:
+        hour = int(hh)
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if ampm == "PM" else 0)
+        # Pecahan ikut dihitung: int() membulatkan ke nol, jadi untuk epoch
+        # negatif (sebelum 1970) hasilnya beda jika pecahan dibuang
+        usec = int(frac.ljust(6, "0")) if frac else 0
+        dt = datetime(int(year), month, int(day[:-1]), hour, int(mm), int(ss), usec)
+        # timestamp() konversi waktu lokal → UTC bisa gagal di ujung rentang
+        # (mis. tahun 0001 / 9999), sama seperti jalur strptime → None
+        return int(dt.timestamp())
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def timeline_bucket(e: dict) -> str | None:
+    """Key bucket per jam ("%Y-%m-%d %H:00") untuk timeline, None jika tanpa waktu."""
+    ts = None
+    if "timestamp" in e and e["timestamp"]:
+        try:
+            ts = int(e["timestamp"])
+        except Exception:
+            ts = None
+
+    if ts is None and "Time" in e:
+        ts = parse_oci_time(e.get("Time"))
+
+    if ts is None:
+        return None
+
+    return _hour_label(ts // 60)
+
+
+@lru_cache(maxsize=65536)
+def _hour_label(epoch_minute: int) -> str:
+    """
+    Label jam lokal untuk satu menit epoch. Di-cache per menit (bukan per jam
+    UTC) supaya tetap benar untuk zona waktu dengan offset :30 / :45, sehingga
+    strftime hanya jalan sekali per menit, bukan sekali per entry.
+    """
+    return datetime.fromtimestamp(epoch_minute * 60).strftime("%Y-%m-%d %H:00")
+
+
+def choose_primary_tenant(tenants_counter: dict) -> str:
+    """Ambil hostname paling dominan dari hitungan tenant (whitelist)."""
+    if not tenants_counter:
         return "-"
-    return c.most_common(1)[0][0]
+    return max(tenants_counter.items(), key=lambda kv: kv[1])[0]
 
 
 # ============================================================
 #  BUILD JSON UNTUK /api/data
 # ============================================================
-def build_api_data(entries: list[dict]) -> dict:
-    """Bangun payload JSON untuk dashboard front-end."""
-    filtered = [e for e in entries if extract_hostname(e) in WHITELIST_TENANTS]
+def build_api_data(entries: Iterable[dict]) -> dict:
+    """
+    Bangun payload JSON untuk dashboard front-end.
+    Entries dibaca sekali jalan: filter whitelist, hitungan tenant,
+    timeline, dan analisis MITRE dilakukan dalam satu pass.
+    """
+    tenants_counter = defaultdict(int)
+    timeline_counter = defaultdict(int)
+
+    def tenant_entries():
+        for e in entries:
+            h = extract_hostname(e)
+            if h not in WHITELIST_TENANTS:
+                continue
+            tenants_counter[h] += 1
+            key = timeline_bucket(e)
+            if key is not None:
+                timeline_counter[key] += 1
+            yield e
+
+    # Ringkasan MITRE (sekaligus mengisi tenants_counter & timeline_counter)
+    summary = analyze_uris(tenant_entries())
 
     # Jika tidak ada data, return kosong
-    if not filtered:
+    if not tenants_counter:
         return {
             "hostname": "-",
             "identity": "-",
@@ -148,17 +271,15 @@ def build_api_data(entries: list[dict]) -> dict:
             "mitre": [],
         }
 
-    # Ringkasan MITRE
-    summary = analyze_uris(filtered)
     total_attacks = sum(v["count"] for v in summary.values())
 
-    hostname = choose_primary_tenant(filtered)
+    hostname = choose_primary_tenant(tenants_counter)
     identity = HOSTNAME_IDENTITY_MAP.get(hostname, "-")
 
     # ---------------------------------------------------------
     # OWASP Aggregation
     # ---------------------------------------------------------
-    owasp_counter = Counter()
+    owasp_counter = defaultdict(int)
     for mid, d in summary.items():
         cat = OWASP_TOP10_MAP.get(mid)
         if cat:
@@ -167,7 +288,7 @@ def build_api_data(entries: list[dict]) -> dict:
     # ---------------------------------------------------------
     # Severity Distribution (pakai SeverityEngine)
     # ---------------------------------------------------------
-    severity_dist = Counter()
+    severity_dist = defaultdict(int)
     mitre_rows = []
 
     for mid, d in summary.items():
@@ -197,11 +318,6 @@ def build_api_data(entries: list[dict]) -> dict:
     # ---------------------------------------------------------
     # Tenant Summary
     # ---------------------------------------------------------
-    tenants_counter = Counter()
-    for e in filtered:
-        h = extract_hostname(e)
-        tenants_counter[h] += 1
-
     tenants_list = []
     for h in WHITELIST_TENANTS:
         tenants_list.append({
@@ -212,28 +328,6 @@ def build_api_data(entries: list[dict]) -> dict:
 
     tenants_list.sort(key=lambda x: x["events"], reverse=True)
 
-    # ---------------------------------------------------------
-    # Timeline graph (hour bucket)
-    # ---------------------------------------------------------
-    timeline_counter = Counter()
-    for e in filtered:
-        ts = None
-        if "timestamp" in e and e["timestamp"]:
-            try:
-                ts = int(e["timestamp"])
-            except Exception:
-                ts = None
-
-        if ts is None and "Time" in e:
-            ts = parse_oci_time(e.get("Time"))
-
-        if ts is None:
-            continue
-
-        dt = datetime.fromtimestamp(ts)
-        key = dt.strftime("%Y-%m-%d %H:00")
-        timeline_counter[key] += 1
-
     # ---------------------------------------------------------
     # Final payload
     # ---------------------------------------------------------
@@ -274,10 +368,19 @@ def create_app(log_files: list[str]) -> Flask:
     def dashboard():
         return render_template("dashboard_bod.html")
 
+    # Cache payload /api/data: dashboard polling tidak perlu parse + analisis
+    # ulang semua log selama file log tidak berubah.
+    api_cache = {"sig": None, "payload": None}
+    api_cache_lock = threading.Lock()
+
     @app.get("/api/data")
     def api_data():
-        entries = load_all_entries(log_files)
-        data = build_api_data(entries)
+        sig = log_files_signature(log_files)
+        with api_cache_lock:
+            if api_cache["sig"] != sig:
+                api_cache["payload"] = build_api_data(iter_entries(log_files))
+                api_cache["sig"] = sig
+            data = api_cache["payload"]
         return jsonify(data)
 
     return app
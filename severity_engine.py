@@ -16,6 +16,8 @@ SeverityEngine used by server.py. The public API is compatible:
     engine = SeverityEngine(mapping_path="severity_mapping.json", mode="auto")
     sev = engine.classify(mitre_id, count, hostname=..., identity=..., category_hint=None)
 
+get_engine(...) returns a shared, lazily built instance for the same arguments.
+
 It will:
 - Use severity_mapping.json (acunetix + cvss sections) as the primary mapping source.
 - Optionally consume an extra JSON file "mitre_risk.json" if present, containing
@@ -24,15 +26,44 @@ It will:
 
 from __future__ import annotations
 
-import json
 import os
+import sys
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional, Dict, Any
 
+import orjson
+
+
+SEV_ORDER = ("INFO", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+_SEV_RANK = {sev: rank for rank, sev in enumerate(SEV_ORDER)}
 
-SEV_ORDER = ["INFO", "LOW", "MEDIUM", "HIGH", "CRITICAL"]
+# Lower bounds (inclusive) of the MEDIUM / HIGH / CRITICAL risk buckets;
+# anything above 0 and below the first bound is LOW.
+_RISK_THRESHOLDS = (40.0, 70.0, 90.0)
 
 
 class SeverityEngine:
+    # Fixed attribute layout: no per-instance __dict__, slot-offset reads.
+    __slots__ = (
+        "mode",
+        "mapping_raw",
+        "acu",
+        "cvss",
+        "escalation",
+        "_count_high",
+        "_count_critical",
+        "critical_asset_keywords",
+        "asset_criticality",
+        "mitre_risk",
+        "_scores_by_mitre",
+        "_cvss_fallback_by_sev",
+        "_impact_fallback_by_sev",
+        "_base_sev_table",
+        "_classify_cached",
+    )
+
     def __init__(
         self,
         mapping_path: str = "severity_mapping.json",
@@ -58,8 +89,8 @@ class SeverityEngine:
         mapping_full = os.path.join(base_dir, mapping_path)
 
         try:
-            with open(mapping_full, "r") as f:
-                data = json.load(f)
+            with open(mapping_full, "rb") as f:
+                data = orjson.loads(f.read())
         except Exception:
             # If mapping cannot be loaded, fallback to empty dicts (engine still works, but less rich).
             data = {}
@@ -74,14 +105,17 @@ class SeverityEngine:
             or self.cvss.get("escalation")
             or {}
         )
+        # Volume thresholds read once; _volume_factor runs on every classify()
+        self._count_high = self.escalation.get("count_high", 20)
+        self._count_critical = self.escalation.get("count_critical", 200)
 
         # critical asset keywords from mapping (lowercased)
         acu_kw = self.acu.get("critical_asset_keywords", []) or []
         cvss_kw = self.cvss.get("critical_asset_keywords", []) or []
-        self.critical_asset_keywords = {k.lower() for k in (acu_kw + cvss_kw)}
+        self.critical_asset_keywords = frozenset(k.lower() for k in (acu_kw + cvss_kw))
 
         # Hard-coded asset criticality factors (can be tuned as needed)
-        self.asset_criticality = {
+        asset_criticality = {
             # Critical business systems
             "tos-nusantara.pelindo.co.id": 1.5,
             "phinnisi.pelindo.co.id": 1.4,
@@ -90,6 +124,10 @@ class SeverityEngine:
             "ptosc.pelindo.co.id": 1.1,
             "ptosr.pelindo.co.id": 1.1,
         }
+        # Keys normalised the same way as lookups (lowercase, stripped)
+        self.asset_criticality = MappingProxyType({
+            k.lower().strip(): float(v) for k, v in asset_criticality.items()
+        })
 
         # Optional per-MITRE risk metadata (impact, cvss)
         if mitre_risk_path is None:
@@ -98,13 +136,67 @@ class SeverityEngine:
         mitre_risk_full = os.path.join(base_dir, mitre_risk_path)
         if os.path.exists(mitre_risk_full):
             try:
-                with open(mitre_risk_full, "r") as f:
-                    self.mitre_risk = json.load(f) or {}
+                with open(mitre_risk_full, "rb") as f:
+                    self.mitre_risk = orjson.loads(f.read()) or {}
             except Exception:
                 self.mitre_risk = {}
         else:
             self.mitre_risk = {}
 
+        # Validated per-MITRE (cvss, impact) from mitre_risk.json, coerced once
+        # here so the hot path is a single dict lookup for both scores. Invalid /
+        # out-of-range values are stored as None and fall back to the severity
+        # heuristics.
+        self._scores_by_mitre: Dict[str, tuple[Optional[float], Optional[float]]] = {}
+        risk_items = self.mitre_risk.items() if isinstance(self.mitre_risk, dict) else ()
+        for mid, entry in risk_items:
+            if not isinstance(entry, dict):
+                continue
+            cvss = self._to_float(entry.get("cvss"))
+            if cvss is not None and not 0.0 <= cvss <= 10.0:
+                cvss = None
+            impact = self._to_float(entry.get("impact"))
+            if impact is not None:
+                impact = min(impact, 40.0) if impact >= 0 else None
+            if cvss is not None or impact is not None:
+                self._scores_by_mitre[sys.intern(mid)] = (cvss, impact)
+
+        # Severity-based fallbacks (INFO / unknown handled by the .get default)
+        thresholds = self.cvss.get("cvss_thresholds") or {
+            "critical_min": 9.0,
+            "high_min": 7.0,
+            "medium_min": 4.0,
+            "low_min": 0.1,
+        }
+        self._cvss_fallback_by_sev: Dict[str, float] = {
+            "CRITICAL": max(9.5, thresholds.get("critical_min", 9.0)),
+            "HIGH": max(7.5, thresholds.get("high_min", 7.0)),
+            "MEDIUM": max(5.5, thresholds.get("medium_min", 4.0)),
+            "LOW": max(3.0, thresholds.get("low_min", 0.1)),
+        }
+        self._impact_fallback_by_sev: Dict[str, float] = {
+            "CRITICAL": 40.0,
+            "HIGH": 30.0,
+            "MEDIUM": 20.0,
+            "LOW": 10.0,
+        }
+
+        # Static base severity per MITRE id (category_hint=None), resolved once
+        # through the full priority chain of _resolve_base_severity().
+        known_ids = set()
+        for section in (self.acu, self.cvss):
+            for key in ("mitre_overrides", "mitre_to_category"):
+                known_ids.update(section.get(key) or {})
+        # Keys are interned so lookups with an interned id hit on identity.
+        self._base_sev_table: Dict[str, tuple[Optional[str], Optional[str]]] = {
+            sys.intern(mid): self._resolve_base_severity(mid, None)
+            for mid in known_ids
+        }
+
+        # Per-instance memo of the classification pipeline. The mapping is
+        # static after __init__, so results only depend on the cache key.
+        self._classify_cached = lru_cache(maxsize=8192)(self._classify_uncached)
+
 
     # ======================================================================
     # Public API
@@ -125,20 +217,49 @@ class SeverityEngine:
         - Adjusts based on asset criticality and critical keywords.
         - Converts risk score to severity (INFO..CRITICAL).
         - Takes the maximum between static severity and risk-based severity.
+
+        Results are memoized per (mitre_id, volume factor, hostname, identity,
+        category_hint), so repeated techniques/hosts skip the pipeline.
         """
         mitre_id = (mitre_id or "").strip()
-        count = int(count or 0)
 
+        # Callers pass raw hostname / identity; lowercase them once here so the
+        # helpers don't repeat it and case variants share one cache entry.
+        hostname = (hostname or "").lower()
+        identity = (identity or "").lower()
+
+        # Count only matters through its volume factor, so key the cache on
+        # that instead of the raw count to keep the number of keys small.
+        volume_score = self._volume_factor(count)
+
+        return self._classify_cached(
+            mitre_id, volume_score, hostname, identity, category_hint
+        )
+
+
+    def _classify_uncached(
+        self,
+        mitre_id: str,
+        volume_score: float,
+        hostname: Optional[str],
+        identity: Optional[str],
+        category_hint: Optional[str],
+    ) -> str:
+        """Full classification pipeline behind classify()'s memo cache."""
         base_sev, _category_from_map = self._base_severity(mitre_id, category_hint)
 
         if base_sev is None:
             base_sev = "LOW"
 
+        # Nothing ranks above CRITICAL, so the risk score cannot change the result
+        if isinstance(base_sev, str) and base_sev.upper() == "CRITICAL":
+            return base_sev
+
         # Compute risk-based score and derived severity
         risk_score = self._compute_risk_score(
             mitre_id=mitre_id,
             base_severity=base_sev,
-            count=count,
+            volume_score=volume_score,
             hostname=hostname,
             identity=identity,
         )
@@ -159,7 +280,21 @@ class SeverityEngine:
     ) -> tuple[Optional[str], Optional[str]]:
         """
         Find a "static" base severity derived from mapping JSON, ignoring volume.
-        Priority:
+        Without a category_hint this is a single lookup in the table built at
+        __init__; ids missing from every mapping section resolve to (None, None).
+        """
+        if category_hint is None:
+            return self._base_sev_table.get(mitre_id, (None, None))
+        return self._resolve_base_severity(mitre_id, category_hint)
+
+
+    def _resolve_base_severity(
+        self,
+        mitre_id: str,
+        category_hint: Optional[str],
+    ) -> tuple[Optional[str], Optional[str]]:
+        """
+        Resolve the base severity through the mapping priority chain:
         1) acunetix.mitre_overrides[mitre_id]
         2) acunetix.mitre_to_category[mitre_id] → acunetix.category_to_severity
         3) cvss.mitre_to_category[mitre_id] → cvss.category_to_severity
@@ -203,7 +338,7 @@ class SeverityEngine:
         self,
         mitre_id: str,
         base_severity: str,
-        count: int,
+        volume_score: float,
         hostname: Optional[str],
         identity: Optional[str],
     ) -> float:
@@ -215,24 +350,20 @@ class SeverityEngine:
         """
         base_severity = (base_severity or "LOW").upper()
 
-        # 1) CVSS base (0–10)
-        cvss_score = self._cvss_for_mitre(mitre_id, base_severity)
-
-        # 2) MITRE impact (0–40)
-        impact_score = self._impact_for_mitre(mitre_id, base_severity)
+        # 1) CVSS base (0–10) and 2) MITRE impact (0–40)
+        cvss_score, impact_score = self._scores_for_mitre(mitre_id, base_severity)
 
-        # 3) Volume / spike factor (0–40)
-        volume_score = self._volume_factor(count)
+        # 3) Volume / spike factor (0–40), precomputed by classify()
 
         # Raw risk
         risk = (cvss_score * 6.0) + impact_score + volume_score
 
-        # 4) Asset criticality factor
-        asset_factor = self._asset_factor(hostname, identity)
+        # 4) Asset criticality factor (+ keyword hit for step 5, same pass)
+        asset_factor, has_keyword = self._asset_and_keyword(hostname, identity)
         risk *= asset_factor
 
         # 5) Critical keyword boost (mimic "crown jewels")
-        if self._has_critical_keyword(hostname, identity):
+        if has_keyword:
             # Bump by 10 but not above 100
             risk += 10.0
 
@@ -245,75 +376,36 @@ class SeverityEngine:
         return risk
 
 
-    def _cvss_for_mitre(self, mitre_id: str, base_severity: str) -> float:
-        """
-        Determine a CVSS-like score for this technique.
-        Priority:
-        1) mitre_risk[mitre_id]["cvss"]
-        2) cvss_thresholds defaults based on base_severity
+    def _scores_for_mitre(self, mitre_id: str, base_severity: str) -> tuple[float, float]:
         """
-        # 1) If we have explicit CVSS from mitre_risk.json
-        entry = self.mitre_risk.get(mitre_id) if self.mitre_risk else None
-        if isinstance(entry, dict):
-            val = entry.get("cvss")
-            try:
-                if val is not None:
-                    v = float(val)
-                    if 0.0 <= v <= 10.0:
-                        return v
-            except Exception:
-                pass
-
-        # 2) Fallback to heuristic based on base severity
-        base_severity = base_severity.upper()
-        thresholds = self.cvss.get("cvss_thresholds") or {
-            "critical_min": 9.0,
-            "high_min": 7.0,
-            "medium_min": 4.0,
-            "low_min": 0.1,
-        }
-
-        if base_severity == "CRITICAL":
-            return max(9.5, thresholds.get("critical_min", 9.0))
-        if base_severity == "HIGH":
-            return max(7.5, thresholds.get("high_min", 7.0))
-        if base_severity == "MEDIUM":
-            return max(5.5, thresholds.get("medium_min", 4.0))
-        if base_severity == "LOW":
-            return max(3.0, thresholds.get("low_min", 0.1))
-        # INFO or unknown
-        return 1.0
+        Return (cvss, impact) for this technique with one table lookup.
 
+        CVSS-like score (0–10). Priority:
+        1) mitre_risk[mitre_id]["cvss"]
+        2) cvss_thresholds defaults based on base_severity (1.0 for INFO/unknown)
 
-    def _impact_for_mitre(self, mitre_id: str, base_severity: str) -> float:
-        """
         MITRE impact score (0–40). Higher means more dangerous technique by nature.
         Priority:
         1) mitre_risk[mitre_id]["impact"]
-        2) Heuristic derived from base severity
+        2) Heuristic derived from base severity (5.0 for INFO/unknown)
         """
-        entry = self.mitre_risk.get(mitre_id) if self.mitre_risk else None
-        if isinstance(entry, dict):
-            val = entry.get("impact")
-            try:
-                if val is not None:
-                    v = float(val)
-                    if v >= 0:
-                        return min(v, 40.0)
-            except Exception:
-                pass
+        cvss, impact = self._scores_by_mitre.get(mitre_id, (None, None))
+        if cvss is None:
+            cvss = self._cvss_fallback_by_sev.get(base_severity.upper(), 1.0)
+        if impact is None:
+            impact = self._impact_fallback_by_sev.get(base_severity.upper(), 5.0)
+        return cvss, impact
 
-        # Fallback heuristic
-        sev = base_severity.upper()
-        if sev == "CRITICAL":
-            return 40.0
-        if sev == "HIGH":
-            return 30.0
-        if sev == "MEDIUM":
-            return 20.0
-        if sev == "LOW":
-            return 10.0
-        return 5.0  # INFO/unknown
+
+    @staticmethod
+    def _to_float(val: Any) -> Optional[float]:
+        """float(val), or None if val is missing or not numeric."""
+        if val is None:
+            return None
+        try:
+            return float(val)
+        except Exception:
+            return None
 
 
     def _volume_factor(self, count: int) -> float:
@@ -326,53 +418,59 @@ class SeverityEngine:
         - Else if small but nonzero → minor contribution (+5)
         """
         count = int(count or 0)
-        esc = self.escalation or {}
 
-        count_high = esc.get("count_high", 20)
-        count_critical = esc.get("count_critical", 200)
-
-        if count >= count_critical:
+        if count >= self._count_critical:
             return 30.0
-        if count >= count_high:
+        if count >= self._count_high:
             return 15.0
         if count > 0:
             return 5.0
         return 0.0
 
 
-    def _asset_factor(self, hostname: Optional[str], identity: Optional[str]) -> float:
+    def _asset_and_keyword(
+        self, hostname: Optional[str], identity: Optional[str]
+    ) -> tuple[float, bool]:
         """
-        Return multiplicative factor based on asset criticality.
+        Return (asset_factor, has_critical_keyword) with one round of string
+        normalisation:
+
+        - asset_factor: multiplicative factor based on asset criticality
+          (direct hostname mapping, else 1.4 on a keyword hit, else 1.0).
+        - has_critical_keyword: whether hostname or identity contains any
+          "crown jewel" keyword, for an additional bump beyond asset_factor.
+
+        hostname / identity arrive already lowercased by classify().
         """
-        hostname = (hostname or "").lower().strip()
-        identity = (identity or "").lower().strip()
+        host = hostname or ""
+        ident = identity or ""
+        keywords = self.critical_asset_keywords
 
-        # 1) Direct hostname mapping
-        if hostname in self.asset_criticality:
-            return float(self.asset_criticality[hostname])
+        text = f"{host} {ident}"
+        has_kw = any(kw and kw in text for kw in keywords)
+
+        host_s = host.strip()
+        ident_s = ident.strip()
 
-        # 2) Keyword-based mapping using identity text
-        text = f"{hostname} {identity}"
-        if any(k in text for k in self.critical_asset_keywords):
+        # 1) Direct hostname mapping
+        factor = self.asset_criticality.get(host_s)
+        if factor is not None:
+            return factor, has_kw
+
+        # 2) Keyword-based mapping using identity text (stripped); reuse the
+        #    scan above when stripping changed nothing (str.strip() returns
+        #    the same object then, so no second text is built)
+        if host_s is host and ident_s is ident:
+            hit = has_kw or "" in keywords
+        else:
+            stripped = f"{host_s} {ident_s}"
+            hit = any(k in stripped for k in keywords)
+        if hit:
             # treat as high importance if keyword hits
-            return 1.4
+            return 1.4, has_kw
 
         # 3) Default factor
-        return 1.0
-
-
-    def _has_critical_keyword(self, hostname: Optional[str], identity: Optional[str]) -> bool:
-        """
-        Check whether hostname or identity contains any "crown jewel" keyword
-        to give an additional bump beyond asset_factor.
-        """
-        text = f"{hostname or ''} {identity or ''}".lower()
-        if not text:
-            return False
-        for kw in self.critical_asset_keywords:
-            if kw and kw in text:
-                return True
-        return False
+        return 1.0, has_kw
 
 
     # ======================================================================
@@ -387,24 +485,15 @@ class SeverityEngine:
         except Exception:
             s = 0.0
 
-        if s >= 90.0:
-            return "CRITICAL"
-        if s >= 70.0:
-            return "HIGH"
-        if s >= 40.0:
-            return "MEDIUM"
-        if s > 0.0:
-            return "LOW"
-        return "INFO"
+        # <= 0 (and NaN) is INFO; otherwise LOW + number of bounds reached
+        if not s > 0.0:
+            return "INFO"
+        return SEV_ORDER[1 + bisect_right(_RISK_THRESHOLDS, s)]
 
 
     @staticmethod
     def _rank(sev: str) -> int:
-        sev = (sev or "").upper()
-        try:
-            return SEV_ORDER.index(sev)
-        except ValueError:
-            return 0  # INFO as default
+        return _SEV_RANK.get((sev or "").upper(), 0)  # INFO as default
 
 
     def _max_severity(self, a: str, b: str) -> str:
@@ -412,3 +501,26 @@ class SeverityEngine:
         ra = self._rank(a)
         rb = self._rank(b)
         return a if ra >= rb else b
+
+
+# ======================================================================
+# Shared instance
+# ======================================================================
+@lru_cache(maxsize=None)
+def get_engine(
+    mapping_path: str = "severity_mapping.json",
+    mode: str = "auto",
+    mitre_risk_path: Optional[str] = None,
+) -> SeverityEngine:
+    """
+    Return one shared SeverityEngine per argument set, built on first use.
+
+    Call it at module import (before a pre-forking server such as
+    gunicorn --preload forks) so workers inherit the parsed mapping and
+    precomputed tables copy-on-write instead of each rebuilding them.
+    """
+    return SeverityEngine(
+        mapping_path=mapping_path,
+        mode=mode,
+        mitre_risk_path=mitre_risk_path,
+    )